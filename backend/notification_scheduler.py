@@ -1,18 +1,36 @@
 import asyncio
-import schedule
-import time
 import logging
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
 import os
-from server import github_client, leetcode_scraper, db
+from typing import Optional, Set
+from fastapi import HTTPException
+from pymongo import WriteConcern
+from server import (
+    github_client, leetcode_scraper, db, TRIGGER_INDEX,
+    open_http_clients, close_http_clients
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Notification logs are audit records, so don't wait for the server to acknowledge them
+notification_logs_collection = db.get_collection("notification_logs", write_concern=WriteConcern(w=0))
+
 class NotificationScheduler:
-    def __init__(self):
+    def __init__(self, read_triggers_from_db: bool = False):
         self.running = False
+        # A standalone scheduler doesn't see the API's trigger routes, so it reads
+        # each minute's triggers from Mongo instead of TRIGGER_INDEX
+        self.read_triggers_from_db = read_triggers_from_db
+        self._task: Optional[asyncio.Task] = None
+        self._tick_tasks: Set[asyncio.Task] = set()
+        # Triggers already dispatched for _fired_minute, so reloads don't repeat them
+        self._fired_minute: Optional[str] = None
+        self._fired_ids: Set[str] = set()
+        # Set by the trigger routes when TRIGGER_INDEX changes. Created in run() so it
+        # belongs to the loop the scheduler runs on
+        self.trigger_reload: Optional[asyncio.Event] = None
         
     async def check_and_notify_user(self, username: str, platform: str):
         """Check platform status and send notification if needed"""
@@ -20,8 +38,27 @@ class NotificationScheduler:
             logger.info(f"Checking {platform} status for {username}")
             
             if platform == "github":
-                status = await github_client.check_commits_today(username)
-                if not status.has_commits_today:
+                # Pushes recorded by the GitHub webhook (or an earlier check) already
+                # settle today, so only users without one need the API
+                completed = await db.platform_status.find_one({
+                    "username": username,
+                    "platform": "github",
+                    "date": datetime.now(timezone.utc).strftime('%Y-%m-%d'),
+                    "completed_today": True
+                })
+                if completed:
+                    return {"status": "completed"}
+                
+                # Reminders only need a yes/no, not the commit details. The calendar
+                # misses commits to non-default branches and forks, so confirm a zero
+                # against the (ETag-cached) events feed the dashboard uses
+                try:
+                    contributions = await github_client.contributions_today(username)
+                except HTTPException as e:
+                    # GraphQL has its own rate-limit budget, so the REST feed may still work
+                    logger.warning(f"Contribution calendar unavailable for {username}, using events: {e.detail}")
+                    contributions = 0
+                if contributions == 0 and not (await github_client.check_commits_today(username)).has_commits_today:
                     logger.info(f"🔔 NOTIFICATION: {username} hasn't made any GitHub commits today!")
                     # Here you would send actual notification (email, push, etc.)
                     return {
@@ -47,83 +84,161 @@ class NotificationScheduler:
             logger.error(f"Error checking {platform} for {username}: {str(e)}")
             return {"status": "error", "error": str(e)}
 
-    async def process_triggers(self):
+    async def process_triggers(self, current_time: Optional[str] = None):
         """Process all active triggers"""
         try:
-            current_time = datetime.now().strftime("%H:%M")
+            current_time = current_time or datetime.now().strftime("%H:%M")
+            
+            if current_time != self._fired_minute:
+                self._fired_minute, self._fired_ids = current_time, set()
             
-            # Get all active triggers for current time
-            triggers = await db.triggers.find({
-                "trigger_time": current_time,
-                "enabled": True
-            }).to_list(1000)
+            if self.read_triggers_from_db:
+                candidates = await db.triggers.find({
+                    "trigger_time": current_time,
+                    "enabled": True
+                }).to_list(1000)
+            else:
+                candidates = TRIGGER_INDEX.get(current_time, [])
+            
+            # Get all active triggers for current time that haven't fired yet
+            triggers = [t for t in candidates if t['id'] not in self._fired_ids]
+            self._fired_ids.update(t['id'] for t in triggers)
             
             logger.info(f"Found {len(triggers)} triggers for {current_time}")
             
+            if not triggers:
+                return
+            
+            # Check each (username, platform) once, concurrently so their network I/O overlaps
+            checks = {(t['username'], t['platform']): None for t in triggers}
+            results = await asyncio.gather(
+                *[self.check_and_notify_user(username, platform) for username, platform in checks],
+                return_exceptions=True
+            )
+            for key, result in zip(checks, results):
+                if isinstance(result, BaseException):
+                    result = {"status": "error", "error": str(result)}
+                checks[key] = result
+            
+            # Log the notifications in a single write
+            checked_at = datetime.now(timezone.utc)
+            notification_logs = []
             for trigger in triggers:
-                username = trigger['username']
-                platform = trigger['platform']
-                
-                # Check and notify
-                result = await self.check_and_notify_user(username, platform)
-                
-                # Log the notification
-                notification_log = {
+                result = checks[(trigger['username'], trigger['platform'])]
+                notification_logs.append({
                     "trigger_id": trigger['id'],
-                    "username": username,
-                    "platform": platform,
-                    "checked_at": datetime.now(timezone.utc),
+                    "username": trigger['username'],
+                    "platform": trigger['platform'],
+                    "checked_at": checked_at,
                     "result": result
-                }
-                
-                await db.notification_logs.insert_one(notification_log)
+                })
+            
+            await notification_logs_collection.insert_many(notification_logs, ordered=False)
                 
         except Exception as e:
             logger.error(f"Error processing triggers: {str(e)}")
 
-    def start_scheduler(self):
-        """Start the notification scheduler"""
+    async def sleep_until(self, deadline: datetime):
+        """Sleep until the wall clock reaches deadline, never returning before it"""
+        while (remaining := (deadline - datetime.now()).total_seconds()) > 0:
+            await asyncio.sleep(remaining)
+
+    def dispatch(self, current_time: str):
+        """Process a minute's triggers in the background so a slow tick can't delay the loop"""
+        task = asyncio.create_task(self.process_triggers(current_time))
+        self._tick_tasks.add(task)
+        task.add_done_callback(self._tick_tasks.discard)
+
+    async def run(self):
+        """Run process_triggers at the top of every minute on the current event loop"""
         logger.info("🚀 Starting notification scheduler...")
-        
-        # Schedule to run every minute
-        schedule.every().minute.do(lambda: asyncio.run(self.process_triggers()))
-        
         self.running = True
+        self.trigger_reload = asyncio.Event()
+        next_tick = datetime.now().replace(second=0, microsecond=0) + timedelta(minutes=1)
+        sleep_task: Optional[asyncio.Task] = None
+        reload_task: Optional[asyncio.Task] = None
         
-        while self.running:
-            schedule.run_pending()
-            time.sleep(30)  # Check every 30 seconds
+        try:
+            while self.running:
+                if sleep_task is None:
+                    sleep_task = asyncio.create_task(self.sleep_until(next_tick))
+                reload_task = asyncio.create_task(self.trigger_reload.wait())
+                
+                done, _ = await asyncio.wait({sleep_task, reload_task}, return_when=asyncio.FIRST_COMPLETED)
+                
+                if reload_task in done:
+                    # A failed wait isn't a reload; surface it rather than spinning
+                    if reload_task.exception() is not None:
+                        raise reload_task.exception()
+                    
+                    # Fire triggers added for the current minute after its tick went by
+                    self.trigger_reload.clear()
+                    self.dispatch(datetime.now().strftime("%H:%M"))
+                else:
+                    reload_task.cancel()
+                
+                if sleep_task in done:
+                    self.dispatch(next_tick.strftime("%H:%M"))
+                    sleep_task = None
+                    next_tick += timedelta(minutes=1)
+                    if next_tick <= datetime.now():
+                        # The clock jumped or the host was suspended; resume from the next minute
+                        next_tick = datetime.now().replace(second=0, microsecond=0) + timedelta(minutes=1)
+        finally:
+            for task in (sleep_task, reload_task):
+                if task is not None:
+                    task.cancel()
+
+    def start_scheduler(self):
+        """Start the notification scheduler as a task on the running event loop"""
+        self._task = asyncio.create_task(self.run())
 
     def stop_scheduler(self):
         """Stop the notification scheduler"""
         logger.info("⏹️ Stopping notification scheduler...")
         self.running = False
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for task in self._tick_tasks:
+            task.cancel()
 
 # CLI interface
 if __name__ == "__main__":
     import sys
     
-    scheduler = NotificationScheduler()
+    scheduler = NotificationScheduler(read_triggers_from_db=True)
     
     if len(sys.argv) > 1 and sys.argv[1] == "--test":
         # Test mode - check notifications for the configured user
         async def test_notifications():
             username = os.environ.get('GITHUB_USERNAME', 'NK-NiteshKumar')
             print(f"\n🧪 Testing notifications for {username}...")
+            await open_http_clients()
             
-            # Test GitHub
-            github_result = await scheduler.check_and_notify_user(username, "github")
-            print(f"GitHub: {github_result}")
-            
-            # Test LeetCode
-            leetcode_result = await scheduler.check_and_notify_user(username, "leetcode")
-            print(f"LeetCode: {leetcode_result}")
+            try:
+                # Test GitHub
+                github_result = await scheduler.check_and_notify_user(username, "github")
+                print(f"GitHub: {github_result}")
+                
+                # Test LeetCode
+                leetcode_result = await scheduler.check_and_notify_user(username, "leetcode")
+                print(f"LeetCode: {leetcode_result}")
+            finally:
+                await close_http_clients()
             
         asyncio.run(test_notifications())
     else:
-        # Normal mode - run scheduler
+        # Normal mode - run a single scheduler for API processes started with RUN_SCHEDULER=false
+        async def run_standalone():
+            await open_http_clients()
+            try:
+                await scheduler.run()
+            finally:
+                await close_http_clients()
+        
         try:
-            scheduler.start_scheduler()
+            asyncio.run(run_standalone())
         except KeyboardInterrupt:
             scheduler.stop_scheduler()
             logger.info("Scheduler stopped by user")
\ No newline at end of file
@@ -1,19 +1,44 @@
-from fastapi import FastAPI, APIRouter, HTTPException, BackgroundTasks
+from fastapi import FastAPI, APIRouter, HTTPException, BackgroundTasks, Request
 from dotenv import load_dotenv
+from fastapi.responses import ORJSONResponse
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import OperationFailure
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import uuid
+import time
 from datetime import datetime, timezone, timedelta
 import httpx
 import asyncio
-import requests
 from bs4 import BeautifulSoup
 import json
+import sys
+import orjson
+import hmac
+import hashlib
+from collections import defaultdict, OrderedDict
+from types import MappingProxyType
+from urllib.parse import parse_qs
+
+# GitHub timestamps end in "Z"; ciso8601 parses them in C, and fromisoformat
+# accepts the suffix natively from Python 3.11
+try:
+    from ciso8601 import parse_datetime as parse_iso_datetime
+except ImportError:
+    if sys.version_info >= (3, 11):
+        parse_iso_datetime = datetime.fromisoformat
+    else:
+        def parse_iso_datetime(value: str) -> datetime:
+            return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -23,16 +48,81 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
+# Run the notification scheduler inside this API process. Turn it off on all but one
+# process when running several workers or replicas, or when running
+# notification_scheduler.py on its own
+RUN_SCHEDULER = os.environ.get('RUN_SCHEDULER', 'true').lower() in ('1', 'true', 'yes')
+
 # GitHub Configuration
 GITHUB_TOKEN = os.environ.get('GITHUB_TOKEN', '')
 GITHUB_USERNAME = os.environ.get('GITHUB_USERNAME', '')
+GITHUB_WEBHOOK_SECRET = os.environ.get('GITHUB_WEBHOOK_SECRET', '')
 GITHUB_API_BASE = "https://api.github.com"
+# Serve events straight from cache for this long before revalidating with GitHub
+GITHUB_EVENTS_FRESH_SECONDS = 60
+# Any username can be checked, so bound the per-user caches (least recently used goes first)
+GITHUB_CACHE_MAX_ENTRIES = 512
+GITHUB_HEADERS = MappingProxyType({
+    "Authorization": f"Bearer {GITHUB_TOKEN}",
+    "Accept": "application/vnd.github+json",
+    "X-GitHub-Api-Version": "2022-11-28"
+})
+GITHUB_CONTRIBUTIONS_QUERY = """
+query contributionsToday($login: String!, $from: DateTime!, $to: DateTime!) {
+    user(login: $login) {
+        contributionsCollection(from: $from, to: $to) {
+            contributionCalendar {
+                weeks {
+                    contributionDays {
+                        contributionCount
+                    }
+                }
+            }
+        }
+    }
+}
+"""
+
+# LeetCode Configuration
+LEETCODE_HEADERS = MappingProxyType({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+})
+LEETCODE_POTD_QUERY = """
+query questionOfToday {
+    activeDailyCodingChallengeQuestion {
+        date
+        userStatus
+        link
+        question {
+            acRate
+            difficulty
+            freqBar
+            frontendQuestionId: questionFrontendId
+            isFavor
+            paidOnly: isPaidOnly
+            status
+            title
+            titleSlug
+            hasVideoSolution
+            hasSolution
+            topicTags {
+                name
+                id
+                slug
+            }
+        }
+    }
+}
+"""
+# The POTD request never varies, so encode its body once
+LEETCODE_POTD_BODY = orjson.dumps({'query': LEETCODE_POTD_QUERY})
 
 # Create the main app without a prefix
 app = FastAPI(
     title="Reminder App API",
     description="Track GitHub commits and LeetCode POTD with notifications",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Create a router with the /api prefix
@@ -85,61 +175,115 @@ class GitHubAPIClient:
     def __init__(self):
         self.token = GITHUB_TOKEN
         self.base_url = GITHUB_API_BASE
-        self.headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Accept": "application/vnd.github+json",
-            "X-GitHub-Api-Version": "2022-11-28"
-        }
+        self.headers = GITHUB_HEADERS
+        # Shared keep-alive HTTP/2 client, opened and closed by the app lifecycle hooks
+        self.client: Optional[httpx.AsyncClient] = None
+        # (username, since) -> (etag, [(created_at, event)], fetched_at)
+        self._etag_cache: Dict[
+            Tuple[str, Optional[datetime]],
+            Tuple[str, List[Tuple[datetime, Dict[str, Any]]], float]
+        ] = OrderedDict()
+        # (username, UTC date) -> (events etag, status computed from those events)
+        self._status_cache: Dict[Tuple[str, str], Tuple[str, GitHubStatus]] = OrderedDict()
     
-    async def get_user_events(self, username: str) -> List[Dict[str, Any]]:
-        """Fetch recent user events from GitHub API"""
-        events = []
+    def cache_store(self, cache: OrderedDict, key: Any, value: Any):
+        """Store value as the most recently used entry, evicting beyond GITHUB_CACHE_MAX_ENTRIES"""
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > GITHUB_CACHE_MAX_ENTRIES:
+            cache.popitem(last=False)
+    
+    def parse_events(
+        self, content: bytes, since: Optional[datetime] = None
+    ) -> List[Tuple[datetime, Dict[str, Any]]]:
+        """Parse an events page into (created_at, event) pairs, stopping at the first event older than since"""
+        # ijson builds events one at a time, so older ones are never materialized
+        items = ijson.items(content, "item") if ijson else orjson.loads(content)
         
-        async with httpx.AsyncClient(timeout=30) as client:
-            try:
-                url = f"{self.base_url}/users/{username}/events"
-                params = {"page": 1, "per_page": 100}
-                
-                response = await client.get(url, headers=self.headers, params=params)
-                
-                if response.status_code == 404:
-                    raise HTTPException(status_code=404, detail="GitHub user not found")
-                elif response.status_code == 403:
-                    raise HTTPException(status_code=403, detail="GitHub API rate limit exceeded")
-                elif response.status_code == 401:
-                    raise HTTPException(status_code=401, detail="Invalid GitHub token")
-                elif response.status_code != 200:
-                    raise HTTPException(status_code=response.status_code, detail="GitHub API error")
-                
-                events = response.json()
-                return events
-            except httpx.RequestError as e:
-                raise HTTPException(status_code=500, detail=f"GitHub API connection error: {str(e)}")
+        events = []
+        for event in items:
+            event_date = parse_iso_datetime(event["created_at"])
+            if since is not None and event_date < since:
+                break
+            events.append((event_date, event))
+        return events
     
+    async def get_user_events(
+        self, username: str, since: Optional[datetime] = None
+    ) -> List[Tuple[datetime, Dict[str, Any]]]:
+        """Fetch recent user events from GitHub API as (created_at, event) pairs, optionally only those after since"""
+        events = []
+        
+        cache_key = (username, since)
+        cached = self._etag_cache.get(cache_key)
+        if cached:
+            self._etag_cache.move_to_end(cache_key)
+        if cached and time.monotonic() - cached[2] < GITHUB_EVENTS_FRESH_SECONDS:
+            return cached[1]
+        
+        try:
+            url = f"{self.base_url}/users/{username}/events"
+            params = {"page": 1, "per_page": 30}
+            headers = {}
+            if cached:
+                # 304 responses don't count against the rate limit
+                headers["If-None-Match"] = cached[0]
+            
+            response = await self.client.get(url, headers=headers, params=params)
+            
+            if response.status_code == 304:
+                self.cache_store(self._etag_cache, cache_key, (cached[0], cached[1], time.monotonic()))
+                return cached[1]
+            elif response.status_code == 404:
+                raise HTTPException(status_code=404, detail="GitHub user not found")
+            elif response.status_code == 403:
+                raise HTTPException(status_code=403, detail="GitHub API rate limit exceeded")
+            elif response.status_code == 401:
+                raise HTTPException(status_code=401, detail="Invalid GitHub token")
+            elif response.status_code != 200:
+                raise HTTPException(status_code=response.status_code, detail="GitHub API error")
+            
+            events = self.parse_events(response.content, since)
+            etag = response.headers.get("ETag")
+            if etag:
+                # Entries for an earlier cutoff (e.g. yesterday's) are no longer useful
+                for key in [key for key in self._etag_cache if key[0] == username and key != cache_key]:
+                    del self._etag_cache[key]
+                self.cache_store(self._etag_cache, cache_key, (etag, events, time.monotonic()))
+            return events
+        except httpx.RequestError as e:
+            raise HTTPException(status_code=500, detail=f"GitHub API connection error: {str(e)}")
+
     async def check_commits_today(self, username: str) -> GitHubStatus:
         """Check if user has made any commits today"""
-        today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        now = datetime.now(timezone.utc)
+        today = now.strftime('%Y-%m-%d')
+        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
         today_commits = []
         
         try:
-            events = await self.get_user_events(username)
+            events = await self.get_user_events(username, since=today_start)
+            
+            # Unchanged events on the same UTC day give the same answer
+            etag = self._etag_cache.get((username, today_start), (None,))[0]
+            cached = self._status_cache.get((username, today))
+            if cached and etag and cached[0] == etag:
+                self._status_cache.move_to_end((username, today))
+                return cached[1].model_copy(update={"check_timestamp": now})
             
-            # Process push events for today
-            for event in events:
+            # Process push events for today; get_user_events already dropped older ones
+            for event_date, event in events:
                 if event.get("type") != "PushEvent":
                     continue
                     
-                event_date = datetime.fromisoformat(event["created_at"].replace("Z", "+00:00"))
-                if event_date < today_start:
-                    continue
-                    
                 # Extract commit information from push event
                 payload = event.get("payload", {})
                 commits = payload.get("commits", [])
                 repo_name = event.get("repo", {}).get("name", "")
                 
+                # Fields come straight from GitHub's schema, so skip validation
                 for commit in commits:
-                    commit_info = CommitInfo(
+                    commit_info = CommitInfo.model_construct(
                         sha=commit["sha"],
                         message=commit["message"],
                         author=commit["author"]["name"],
@@ -149,59 +293,108 @@ class GitHubAPIClient:
                     )
                     today_commits.append(commit_info)
             
-            return GitHubStatus(
+            status = GitHubStatus(
                 username=username,
                 has_commits_today=len(today_commits) > 0,
                 commit_count=len(today_commits),
                 commits=today_commits,
                 check_timestamp=datetime.now(timezone.utc)
             )
+            
+            if etag:
+                # Drop entries from previous days before adding today's
+                for key in [key for key in self._status_cache if key[1] != today]:
+                    del self._status_cache[key]
+                self.cache_store(self._status_cache, (username, today), (etag, status))
+            
+            return status
         except Exception as e:
             logging.error(f"Error checking GitHub commits for {username}: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Error checking GitHub commits: {str(e)}")
 
+    async def contributions_today(self, username: str) -> int:
+        """Count the user's contributions today via the GraphQL contributions calendar"""
+        now = datetime.now(timezone.utc)
+        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        variables = {"login": username, "from": today_start.isoformat(), "to": now.isoformat()}
+        
+        try:
+            response = await self.client.post(
+                f"{self.base_url}/graphql",
+                json={"query": GITHUB_CONTRIBUTIONS_QUERY, "variables": variables}
+            )
+            
+            if response.status_code == 403:
+                raise HTTPException(status_code=403, detail="GitHub API rate limit exceeded")
+            elif response.status_code == 401:
+                raise HTTPException(status_code=401, detail="Invalid GitHub token")
+            elif response.status_code != 200:
+                raise HTTPException(status_code=response.status_code, detail="GitHub API error")
+            
+            # GraphQL reports failures such as rate limiting as a 200 with errors
+            data = response.json()
+            errors = data.get("errors") or []
+            if errors:
+                message = errors[0].get("message", "GitHub GraphQL error")
+                if errors[0].get("type") == "NOT_FOUND":
+                    raise HTTPException(status_code=404, detail="GitHub user not found")
+                elif errors[0].get("type") == "RATE_LIMITED":
+                    raise HTTPException(status_code=403, detail=f"GitHub API rate limit exceeded: {message}")
+                raise HTTPException(status_code=502, detail=f"GitHub GraphQL error: {message}")
+            
+            user = (data.get("data") or {}).get("user")
+            if user is None:
+                raise HTTPException(status_code=404, detail="GitHub user not found")
+            
+            weeks = user["contributionsCollection"]["contributionCalendar"]["weeks"]
+            return weeks[-1]["contributionDays"][-1]["contributionCount"]
+        except httpx.RequestError as e:
+            raise HTTPException(status_code=500, detail=f"GitHub API connection error: {str(e)}")
+
 # LeetCode Scraper
 class LeetCodeScraper:
     def __init__(self):
         self.base_url = "https://leetcode.com"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        self.headers = LEETCODE_HEADERS
+        # Opened and closed by the app lifecycle hooks, like the GitHub client
+        self.client: Optional[httpx.AsyncClient] = None
+        # (UTC date, challenge) - the POTD is the same for every user all day
+        self._potd_cache: Optional[Tuple[str, Dict[str, Any]]] = None
+        # Created on first use and per event loop, since a lock is bound to the loop it waits on
+        self._potd_lock: Optional[asyncio.Lock] = None
+        self._potd_lock_loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    async def get_daily_challenge(self) -> Dict[str, Any]:
+        """Get today's Problem of the Day, fetched at most once per UTC day"""
+        today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+        if self._potd_cache and self._potd_cache[0] == today:
+            return self._potd_cache[1]
+        
+        loop = asyncio.get_running_loop()
+        if self._potd_lock_loop is not loop:
+            self._potd_lock, self._potd_lock_loop = asyncio.Lock(), loop
+        
+        async with self._potd_lock:
+            # Another request may have fetched it while we waited for the lock
+            if self._potd_cache and self._potd_cache[0] == today:
+                return self._potd_cache[1]
+            
+            challenge = await self._fetch_daily_challenge()
+            # Just after midnight LeetCode can still serve yesterday's challenge;
+            # don't pin that for the rest of the day
+            if challenge['date'] == today:
+                self._potd_cache = (today, challenge)
+            return challenge
     
-    def get_daily_challenge(self) -> Dict[str, Any]:
-        """Get today's Problem of the Day"""
+    async def _fetch_daily_challenge(self) -> Dict[str, Any]:
+        """Fetch today's Problem of the Day from LeetCode"""
         try:
             url = f"{self.base_url}/graphql"
-            query = """
-            query questionOfToday {
-                activeDailyCodingChallengeQuestion {
-                    date
-                    userStatus
-                    link
-                    question {
-                        acRate
-                        difficulty
-                        freqBar
-                        frontendQuestionId: questionFrontendId
-                        isFavor
-                        paidOnly: isPaidOnly
-                        status
-                        title
-                        titleSlug
-                        hasVideoSolution
-                        hasSolution
-                        topicTags {
-                            name
-                            id
-                            slug
-                        }
-                    }
-                }
-            }
-            """
-            
-            response = self.session.post(url, json={'query': query})
+            response = await self.client.post(
+                url,
+                content=LEETCODE_POTD_BODY,
+                headers={'Content-Type': 'application/json'}
+            )
             
             if response.status_code != 200:
                 raise Exception(f"LeetCode API returned status {response.status_code}")
@@ -240,7 +433,7 @@ class LeetCodeScraper:
     async def get_potd_status(self, username: str) -> LeetCodeStatus:
         """Get POTD status for user"""
         try:
-            potd_data = self.get_daily_challenge()
+            potd_data = await self.get_daily_challenge()
             
             # For now, we can't check if user solved it without authentication
             # This would require the user to provide LeetCode credentials
@@ -263,6 +456,30 @@ class LeetCodeScraper:
 github_client = GitHubAPIClient()
 leetcode_scraper = LeetCodeScraper()
 
+# Enabled triggers keyed by "HH:MM", kept in sync by the trigger routes so the
+# scheduler never has to query Mongo on its per-minute tick
+TRIGGER_INDEX: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+
+async def load_trigger_index():
+    """Load all enabled triggers into TRIGGER_INDEX"""
+    TRIGGER_INDEX.clear()
+    async for trigger in db.triggers.find({"enabled": True}):
+        TRIGGER_INDEX[trigger['trigger_time']].append(trigger)
+    logging.info(f"Loaded {sum(map(len, TRIGGER_INDEX.values()))} triggers into the trigger index")
+
+def notify_triggers_changed():
+    """Wake this process's scheduler so it picks up triggers due this minute"""
+    scheduler = getattr(app.state, "notification_scheduler", None)
+    if scheduler is not None and scheduler.trigger_reload is not None:
+        scheduler.trigger_reload.set()
+
+def unindex_trigger(trigger: Dict[str, Any]):
+    """Remove a trigger from TRIGGER_INDEX"""
+    bucket = TRIGGER_INDEX.get(trigger['trigger_time'], [])
+    bucket[:] = [t for t in bucket if t['id'] != trigger['id']]
+    if not bucket:
+        TRIGGER_INDEX.pop(trigger['trigger_time'], None)
+
 # Routes
 @api_router.get("/")
 async def root():
@@ -274,15 +491,34 @@ async def check_github_commits(username: str):
     try:
         status = await github_client.check_commits_today(username)
         
-        # Store status in database
-        status_dict = status.dict()
-        status_dict['platform'] = 'github'
-        status_dict['completed_today'] = status.has_commits_today
-        status_dict['date'] = datetime.now(timezone.utc).strftime('%Y-%m-%d')
-        
-        await db.platform_status.insert_one(status_dict)
+        # Keep one status row per user and day rather than one per check
+        status_dict = status.model_dump()
+        await db.platform_status.update_one(
+            {
+                'username': username,
+                'platform': 'github',
+                'date': datetime.now(timezone.utc).strftime('%Y-%m-%d')
+            },
+            {
+                '$set': {
+                    key: value for key, value in status_dict.items()
+                    if key not in ('has_commits_today', 'commit_count')
+                },
+                # The events feed can lag a push the webhook already recorded, so
+                # never downgrade the flags or lower the webhook's count (false < true)
+                '$max': {
+                    'completed_today': status.has_commits_today,
+                    'has_commits_today': status.has_commits_today,
+                    'commit_count': status.commit_count
+                }
+            },
+            upsert=True
+        )
         
-        return status
+        # Returning the response directly skips response_model re-validation;
+        # response_model stays for the OpenAPI schema. JSON mode keeps pydantic's
+        # "Z" timestamps, matching the other endpoints
+        return ORJSONResponse(status.model_dump(mode="json"))
     except Exception as e:
         logging.error(f"Error in check_github_commits: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -293,15 +529,19 @@ async def check_leetcode_potd(username: str):
     try:
         status = await leetcode_scraper.get_potd_status(username)
         
-        # Store status in database
-        status_dict = status.dict()
-        status_dict['platform'] = 'leetcode'
-        status_dict['completed_today'] = status.potd_solved
-        status_dict['date'] = datetime.now(timezone.utc).strftime('%Y-%m-%d')
-        
-        await db.platform_status.insert_one(status_dict)
+        # Keep one status row per user and day rather than one per check
+        status_dict = status.model_dump()
+        await db.platform_status.update_one(
+            {
+                'username': username,
+                'platform': 'leetcode',
+                'date': datetime.now(timezone.utc).strftime('%Y-%m-%d')
+            },
+            {'$set': {**status_dict, 'completed_today': status.potd_solved}},
+            upsert=True
+        )
         
-        return status
+        return ORJSONResponse(status.model_dump(mode="json"))
     except Exception as e:
         logging.error(f"Error in check_leetcode_potd: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -310,27 +550,91 @@ async def check_leetcode_potd(username: str):
 async def get_dashboard(username: str):
     """Get complete dashboard status for user"""
     try:
-        # Check GitHub
-        github_status = await github_client.check_commits_today(username)
-        
-        # Check LeetCode
-        leetcode_status = await leetcode_scraper.get_potd_status(username)
+        # Check GitHub and LeetCode concurrently
+        github_status, leetcode_status = await asyncio.gather(
+            github_client.check_commits_today(username),
+            leetcode_scraper.get_potd_status(username)
+        )
         
-        return {
+        return ORJSONResponse({
             "username": username,
-            "github": github_status.dict(),
-            "leetcode": leetcode_status.dict(),
+            "github": github_status.model_dump(mode="json"),
+            "leetcode": leetcode_status.model_dump(mode="json"),
             "last_updated": datetime.now(timezone.utc).isoformat()
-        }
+        })
     except Exception as e:
         logging.error(f"Error in get_dashboard: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@api_router.post("/webhooks/github")
+async def github_webhook(request: Request):
+    """Record pushes delivered by a GitHub push webhook"""
+    if not GITHUB_WEBHOOK_SECRET:
+        raise HTTPException(status_code=503, detail="GitHub webhook secret not configured")
+    
+    body = await request.body()
+    expected = "sha256=" + hmac.new(GITHUB_WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+    # Starlette decodes headers as latin-1, so this round-trips the raw header bytes.
+    # Compare bytes: compare_digest rejects str values with non-ASCII characters
+    signature = request.headers.get("X-Hub-Signature-256", "").encode("latin-1")
+    if not hmac.compare_digest(expected.encode(), signature):
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+    
+    event = request.headers.get("X-GitHub-Event", "")
+    if event == "ping":
+        return {"message": "pong"}
+    if event != "push":
+        return {"message": f"Ignored {event} event"}
+    
+    # GitHub delivers either raw JSON or a form with the JSON in its payload field
+    content_type = request.headers.get("Content-Type", "").split(";")[0].strip()
+    try:
+        if content_type == "application/x-www-form-urlencoded":
+            form = parse_qs(body.decode())
+            if "payload" not in form:
+                raise HTTPException(status_code=400, detail="Missing webhook payload")
+            payload = json.loads(form["payload"][0])
+        elif content_type == "application/json":
+            payload = json.loads(body)
+        else:
+            raise HTTPException(status_code=415, detail=f"Unsupported webhook content type: {content_type}")
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid webhook payload")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="Invalid webhook payload")
+    commits = payload.get("commits", [])
+    username = (payload.get("sender") or {}).get("login")
+    if not username or not commits:
+        # Branch and tag deletions arrive as pushes without commits
+        return {"message": "No commits to record"}
+    
+    await db.platform_status.update_one(
+        {
+            "username": username,
+            "platform": "github",
+            "date": datetime.now(timezone.utc).strftime('%Y-%m-%d')
+        },
+        {
+            "$set": {
+                "completed_today": True,
+                "has_commits_today": True,
+                "check_timestamp": datetime.now(timezone.utc)
+            },
+            "$inc": {"commit_count": len(commits)}
+        },
+        upsert=True
+    )
+    
+    return {"message": "Push recorded", "username": username, "commit_count": len(commits)}
+
 @api_router.post("/triggers", response_model=NotificationTrigger)
 async def create_trigger(trigger: NotificationTrigger):
     """Create a new notification trigger"""
     trigger_dict = trigger.dict()
     result = await db.triggers.insert_one(trigger_dict)
+    if trigger.enabled:
+        TRIGGER_INDEX[trigger.trigger_time].append(trigger_dict)
+        notify_triggers_changed()
     return trigger
 
 @api_router.get("/triggers/{username}", response_model=List[NotificationTrigger])
@@ -342,9 +646,11 @@ async def get_user_triggers(username: str):
 @api_router.delete("/triggers/{trigger_id}")
 async def delete_trigger(trigger_id: str):
     """Delete a notification trigger"""
-    result = await db.triggers.delete_one({"id": trigger_id})
-    if result.deleted_count == 0:
+    deleted = await db.triggers.find_one_and_delete({"id": trigger_id})
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Trigger not found")
+    unindex_trigger(deleted)
+    notify_triggers_changed()
     return {"message": "Trigger deleted successfully"}
 
 @api_router.get("/health")
@@ -374,6 +680,73 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def open_http_clients():
+    github_client.client = httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=20),
+        timeout=30,
+        headers=github_client.headers
+    )
+    leetcode_scraper.client = httpx.AsyncClient(headers=leetcode_scraper.headers, timeout=30)
+
+async def dedupe_platform_status():
+    """Keep only the newest platform_status row per username, platform and date"""
+    duplicates = db.platform_status.aggregate([
+        {"$sort": {"check_timestamp": -1, "_id": -1}},
+        {"$group": {
+            "_id": {"username": "$username", "platform": "$platform", "date": "$date"},
+            "ids": {"$push": "$_id"}
+        }},
+        {"$match": {"ids.1": {"$exists": True}}}
+    ], allowDiskUse=True)
+    
+    removed = 0
+    async for group in duplicates:
+        result = await db.platform_status.delete_many({"_id": {"$in": group["ids"][1:]}})
+        removed += result.deleted_count
+    logger.info(f"Removed {removed} duplicate platform_status rows")
+
+@app.on_event("startup")
+async def create_indexes():
+    await db.triggers.create_index([("trigger_time", 1), ("enabled", 1)])
+    status_index = [("username", 1), ("platform", 1), ("date", 1)]
+    try:
+        await db.platform_status.create_index(status_index, unique=True)
+    except OperationFailure:
+        # Databases from before the status upserts hold one row per check
+        await dedupe_platform_status()
+        await db.platform_status.create_index(status_index, unique=True)
+    # Let Mongo prune notification logs after a week
+    await db.notification_logs.create_index([("checked_at", 1)], expireAfterSeconds=7 * 86400)
+
+@app.on_event("startup")
+async def prepare_triggers():
+    await load_trigger_index()
+
+@app.on_event("startup")
+async def start_notification_scheduler():
+    if not RUN_SCHEDULER:
+        logger.info("RUN_SCHEDULER is off; not starting the notification scheduler")
+        return
+    
+    # Imported here because notification_scheduler imports this module
+    from notification_scheduler import NotificationScheduler
+    
+    app.state.notification_scheduler = NotificationScheduler()
+    app.state.notification_scheduler.start_scheduler()
+
+@app.on_event("shutdown")
+async def stop_notification_scheduler():
+    scheduler = getattr(app.state, "notification_scheduler", None)
+    if scheduler is not None:
+        scheduler.stop_scheduler()
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    await github_client.client.aclose()
+    await leetcode_scraper.client.aclose()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
\ No newline at end of file
@@ -1,6 +1,9 @@
 import requests
 import sys
+import os
 import json
+import hmac
+import hashlib
 from datetime import datetime
 
 class CodeTrackerAPITester:
@@ -8,6 +11,7 @@ class CodeTrackerAPITester:
         self.base_url = base_url
         self.api_url = f"{base_url}/api"
         self.username = "NK-NiteshKumar"
+        self.webhook_secret = os.environ.get('GITHUB_WEBHOOK_SECRET', '')
         self.tests_run = 0
         self.tests_passed = 0
         self.test_results = []
@@ -27,10 +31,10 @@ class CodeTrackerAPITester:
             "details": details
         })
 
-    def run_test(self, name, method, endpoint, expected_status, data=None, timeout=30):
+    def run_test(self, name, method, endpoint, expected_status, data=None, timeout=30, headers=None, raw_data=None):
         """Run a single API test"""
         url = f"{self.api_url}/{endpoint}"
-        headers = {'Content-Type': 'application/json'}
+        headers = {'Content-Type': 'application/json', **(headers or {})}
 
         print(f"\n🔍 Testing {name}...")
         print(f"   URL: {url}")
@@ -38,6 +42,8 @@ class CodeTrackerAPITester:
         try:
             if method == 'GET':
                 response = requests.get(url, headers=headers, timeout=timeout)
+            elif method == 'POST' and raw_data is not None:
+                response = requests.post(url, data=raw_data, headers=headers, timeout=timeout)
             elif method == 'POST':
                 response = requests.post(url, json=data, headers=headers, timeout=timeout)
             elif method == 'DELETE':
@@ -167,6 +173,38 @@ class CodeTrackerAPITester:
             200
         )
 
+    def test_webhook_bad_signature(self):
+        """Test that webhooks with an invalid signature are rejected"""
+        return self.run_test(
+            "GitHub Webhook Bad Signature",
+            "POST",
+            "webhooks/github",
+            401,
+            raw_data=b'{"zen": "Keep it logically awesome."}',
+            headers={'X-GitHub-Event': 'ping', 'X-Hub-Signature-256': 'sha256=' + '0' * 64}
+        )
+
+    def test_webhook_ping(self):
+        """Test a correctly signed webhook ping"""
+        if not self.webhook_secret:
+            self.log_test("GitHub Webhook Ping", False, "GITHUB_WEBHOOK_SECRET not set for the tester")
+            return False, {}
+        
+        body = b'{"zen": "Keep it logically awesome."}'
+        signature = "sha256=" + hmac.new(self.webhook_secret.encode(), body, hashlib.sha256).hexdigest()
+        success, response = self.run_test(
+            "GitHub Webhook Ping",
+            "POST",
+            "webhooks/github",
+            200,
+            raw_data=body,
+            headers={'X-GitHub-Event': 'ping', 'X-Hub-Signature-256': signature}
+        )
+        if success and response.get("message") != "pong":
+            self.log_test("GitHub Webhook Ping Response", False, f"Expected pong, got {response}")
+            return False, response
+        return success, response
+
     def run_all_tests(self):
         """Run all backend tests"""
         print("🚀 Starting Code Tracker API Tests")
@@ -199,6 +237,10 @@ class CodeTrackerAPITester:
             delete_success, _ = self.test_delete_trigger(trigger_id)
         else:
             self.log_test("Delete Trigger", False, "No trigger to delete")
+        
+        # Test 8: GitHub Webhook
+        self.test_webhook_bad_signature()
+        self.test_webhook_ping()
 
         # Print Summary
         print("\n" + "=" * 60)